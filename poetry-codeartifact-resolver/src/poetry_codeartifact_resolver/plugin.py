@@ -3,8 +3,9 @@
 import os
 import json
 import logging
+import functools
 from pathlib import Path
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Dict, Final, List, Optional, Tuple
 
 from poetry.plugins.plugin import Plugin
 from poetry.repositories.legacy_repository import LegacyRepository
@@ -17,6 +18,91 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
 
+_URL_SCHEME: Final = "codeartifact://"
+
+_PRIORITY_MAP: Final[Dict[str, Priority]] = {
+    "primary": Priority.PRIMARY,
+    "supplemental": Priority.SUPPLEMENTAL,
+    "explicit": Priority.EXPLICIT,
+}
+
+
+def _config_path() -> Path:
+    """Return the Calltree CLI config path, honouring CALLTREE_CONFIG_PATH."""
+    config_path_env = os.environ.get("CALLTREE_CONFIG_PATH", "")
+    if config_path_env:
+        return Path(config_path_env).expanduser()
+    return Path.home() / ".config" / "calltree" / "config.json"
+
+
+@functools.lru_cache(maxsize=1)
+def _region_from_config(cfg_path: str, mtime: float) -> Optional[str]:
+    """Read the current customer's region from the Calltree CLI config.
+
+    Cached on ``(cfg_path, mtime)`` so the file is parsed once per Poetry
+    invocation, but a config rewritten in the meantime is picked up again.
+    """
+    try:
+        with open(cfg_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.debug(f"Config reading failed: {e}")
+        return None
+
+    logger.debug(f"Config data: {data}")
+    if not isinstance(data, dict):
+        return None
+    cur = data.get("current_customer")
+    customers = data.get("customers") or {}
+    logger.debug(f"Current customer: {cur}")
+    logger.debug(f"Customers: {customers}")
+
+    if isinstance(cur, str) and cur and isinstance(customers, dict):
+        cc = customers.get(cur) or {}
+        region = cc.get("region") if isinstance(cc, dict) else None
+        logger.debug(f"Customer config: {cc}")
+        logger.debug(f"Region found: {region}")
+
+        if isinstance(region, str) and region:
+            return region
+
+    return None
+
+
+def _detect_region() -> str:
+    """Determine AWS region with robust precedence.
+
+    Precedence:
+      1) CALLTREE_REGION
+      2) AWS_REGION
+      3) AWS_DEFAULT_REGION
+      4) Calltree CLI config current customer region (~/.config/calltree/config.json)
+      5) us-west-2 (safer default for Calltree)
+    """
+    # Direct overrides first
+    for key in ("CALLTREE_REGION", "AWS_REGION", "AWS_DEFAULT_REGION"):
+        v = os.environ.get(key)
+        if v:
+            return v
+
+    # Fall back to Calltree CLI config if available
+    cfg_path = _config_path()
+    logger.debug(f"Checking config path: {cfg_path}")
+    try:
+        mtime = os.stat(cfg_path).st_mtime
+    except OSError:
+        mtime = None
+    logger.debug(f"Config exists: {mtime is not None}")
+
+    if mtime is not None:
+        region = _region_from_config(str(cfg_path), mtime)
+        if region:
+            return region
+
+    raise RuntimeError(
+        "CodeArtifact region could not be determined. Set CALLTREE_REGION or AWS_REGION or ensure ~/.config/calltree/config.json contains a current customer with a region."
+    )
+
 
 class CodeArtifactResolverPlugin(Plugin):
     """
@@ -24,112 +110,81 @@ class CodeArtifactResolverPlugin(Plugin):
     Works with either CODEARTIFACT_AUTH_TOKEN (CI/Docker) or Poetry's stored credentials (local).
     """
     
-    def _detect_region(self) -> str:
-        """Determine AWS region with robust precedence.
-
-        Precedence:
-          1) CALLTREE_REGION
-          2) AWS_REGION
-          3) AWS_DEFAULT_REGION
-          4) Calltree CLI config current customer region (~/.config/calltree/config.json)
-          5) us-west-2 (safer default for Calltree)
-        """
-        # Direct overrides first
-        for key in ("CALLTREE_REGION", "AWS_REGION", "AWS_DEFAULT_REGION"):
-            v = os.environ.get(key)
-            if v:
-                return v
-
-        # Fall back to Calltree CLI config if available
-        try:
-            config_path_env = os.environ.get("CALLTREE_CONFIG_PATH", "")
-            if config_path_env:
-                cfg_path = Path(config_path_env).expanduser()
-            else:
-                cfg_path = Path.home() / ".config" / "calltree" / "config.json"
-            
-            logger.debug(f"Checking config path: {cfg_path}")
-            logger.debug(f"Config exists: {cfg_path.exists()}")
-            
-            if cfg_path.exists():
-                with cfg_path.open("r", encoding="utf-8") as f:
-                    data = json.load(f)
-                
-                logger.debug(f"Config data: {data}")
-                cur = data.get("current_customer")
-                customers = data.get("customers") or {}
-                logger.debug(f"Current customer: {cur}")
-                logger.debug(f"Customers: {customers}")
-                
-                if cur and isinstance(customers, dict):
-                    cc = customers.get(cur) or {}
-                    region = cc.get("region")
-                    logger.debug(f"Customer config: {cc}")
-                    logger.debug(f"Region found: {region}")
-                    
-                    if isinstance(region, str) and region:
-                        return region
-        except Exception as e:
-            logger.debug(f"Config reading failed: {e}")
-            pass
-
-        raise RuntimeError(
-            "CodeArtifact region could not be determined. Set CALLTREE_REGION or AWS_REGION or ensure ~/.config/calltree/config.json contains a current customer with a region."
-        )
-
     def activate(self, poetry: "Poetry", io: "IO") -> None:
         """Transform codeartifact:// URLs in repository sources."""
 
+        # Read pyproject.toml to find codeartifact:// sources
+        pyproject_data = poetry.pyproject.file.read()
+        sources = pyproject_data.get("tool", {}).get("poetry", {}).get("source", [])
+        ca_sources = [
+            source
+            for source in sources
+            if isinstance(source, dict)
+            and isinstance(source.get("url"), str)
+            and source["url"].startswith(_URL_SCHEME)
+        ]
+        if not ca_sources:
+            # Nothing to resolve, so don't touch the environment or config
+            return
+
         # Get configuration from environment / config
-        aws_region = self._detect_region()
+        aws_region = _detect_region()
         account_id = "831926607337"  # Fixed for Calltree
         auth_token = os.environ.get("CODEARTIFACT_AUTH_TOKEN")
         
-        # Read pyproject.toml to find codeartifact:// sources
-        pyproject_data = poetry.pyproject.file.read()
-        sources = pyproject_data.get("tool", {}).get("poetry", {}).get("source", [])
+        # Host suffix shared by every source in this activation
+        host_suffix = f"-{account_id}.d.codeartifact.{aws_region}.amazonaws.com"
         
-        for source in sources:
-            if isinstance(source, dict) and "url" in source:
-                url = source["url"]
-                name = source.get("name", "unknown")
-                
-                if isinstance(url, str) and url.startswith("codeartifact://"):
-                    # Parse the custom URL scheme
-                    # Format: codeartifact://domain/repository/path
-                    parts = url.replace("codeartifact://", "").split("/", 2)
-                    
-                    if len(parts) >= 2:
-                        domain = parts[0]
-                        repository = parts[1]
-                        path = parts[2] if len(parts) > 2 else "simple"
-                        
-                        # Build the actual CodeArtifact URL
-                        actual_url = (
-                            f"https://{domain}-{account_id}.d.codeartifact."
-                            f"{aws_region}.amazonaws.com/pypi/{repository}/{path}/"
-                        )
-                        
-                        # Create repository with resolved URL
-                        repo = LegacyRepository(name, actual_url)
-                        
-                        # Determine priority
-                        priority_map = {
-                            "primary": Priority.PRIMARY,
-                            "supplemental": Priority.SUPPLEMENTAL,
-                            "explicit": Priority.EXPLICIT,
-                        }
-                        priority = priority_map.get(source.get("priority", "primary"), Priority.PRIMARY)
-                        
-                        # Remove any existing repository with the same name
-                        if poetry.pool.has_repository(name):
-                            poetry.pool.remove_repository(name)
-                        
-                        # Add the new repository
-                        poetry.pool.add_repository(repo, priority=priority)
-                        
-                        if io.is_verbose():
-                            io.write_line(
-                                f"<info>CodeArtifact: Resolved {name} to {aws_region} "
-                                f"({actual_url})</info>"
-                            )
+        resolved: List[Tuple[LegacyRepository, Priority]] = []
+        for source in ca_sources:
+            url = source["url"]
+            name = source.get("name", "unknown")
+            
+            # Parse the custom URL scheme
+            # Format: codeartifact://domain/repository/path
+            domain, _, tail = url[len(_URL_SCHEME):].partition("/")
+            repository, _, path = tail.partition("/")
+            
+            if not (domain and repository):
+                logger.warning(
+                    f"Skipping source {name}: {url} is not of the form "
+                    f"{_URL_SCHEME}domain/repository[/path]"
+                )
+                continue
+            
+            path = path or "simple"
+            
+            # Build the actual CodeArtifact URL
+            actual_url = f"https://{domain}{host_suffix}/pypi/{repository}/{path}/"
+            
+            # Create repository with resolved URL
+            repo = LegacyRepository(name, actual_url)
+            
+            # Determine priority
+            priority = _PRIORITY_MAP.get(source.get("priority", "primary"), Priority.PRIMARY)
+            resolved.append((repo, priority))
+            
+            if io.is_verbose():
+                io.write_line(
+                    f"<info>CodeArtifact: Resolved {name} to {aws_region} "
+                    f"({actual_url})</info>"
+                )
+        
+        # Swap the resolved repositories into the pool in a single pass
+        # (the pool matches repository names case-insensitively). Poetry >=1.5
+        # leaves explicit repositories out of `repositories`, so prefer
+        # `all_repositories` where it exists
+        pool = poetry.pool
+        existing_names = {
+            r.name.lower() for r in getattr(pool, "all_repositories", pool.repositories)
+        }
+        for repo, priority in resolved:
+            key = repo.name.lower()
+            
+            # Remove any existing repository with the same name
+            if key in existing_names:
+                pool.remove_repository(repo.name)
+            
+            # Add the new repository
+            pool.add_repository(repo, priority=priority)
+            existing_names.add(key)
@@ -0,0 +1,114 @@
+"""Tests for codeartifact:// source resolution."""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("poetry")
+
+from poetry.repositories.repository_pool import Priority  # noqa: E402
+
+from poetry_codeartifact_resolver.plugin import CodeArtifactResolverPlugin  # noqa: E402
+
+HOST = "-831926607337.d.codeartifact.us-west-2.amazonaws.com"
+
+
+class FakePool:
+    """Pool that, like Poetry >= 1.5, hides explicit repositories from `repositories`."""
+
+    def __init__(self):
+        self._repos = {}
+        self.removed = []
+
+    @property
+    def repositories(self):
+        return [repo for repo, priority in self._repos.values() if priority != Priority.EXPLICIT]
+
+    @property
+    def all_repositories(self):
+        return [repo for repo, _ in self._repos.values()]
+
+    def has_repository(self, name):
+        return name.lower() in self._repos
+
+    def add_repository(self, repo, priority=Priority.PRIMARY):
+        if repo.name.lower() in self._repos:
+            raise ValueError(f"A repository with name {repo.name} was already added.")
+        self._repos[repo.name.lower()] = (repo, priority)
+
+    def remove_repository(self, name):
+        self.removed.append(name)
+        del self._repos[name.lower()]
+
+    def priority(self, name):
+        return self._repos[name.lower()][1]
+
+
+@pytest.fixture(autouse=True)
+def region(monkeypatch):
+    monkeypatch.delenv("CALLTREE_REGION", raising=False)
+    monkeypatch.delenv("AWS_DEFAULT_REGION", raising=False)
+    monkeypatch.setenv("AWS_REGION", "us-west-2")
+
+
+def _activate(sources, pool=None):
+    pool = pool if pool is not None else FakePool()
+    pyproject = {"tool": {"poetry": {"source": sources}}}
+    poetry = SimpleNamespace(
+        pool=pool,
+        pyproject=SimpleNamespace(file=SimpleNamespace(read=lambda: pyproject)),
+    )
+    io = SimpleNamespace(is_verbose=lambda: False, write_line=lambda line: None)
+    CodeArtifactResolverPlugin().activate(poetry, io)
+    return pool
+
+
+@pytest.mark.parametrize("priority", ["primary", "supplemental", "explicit"])
+def test_replaces_existing_repository_with_same_name(priority):
+    pool = FakePool()
+    placeholder = SimpleNamespace(name="CodeArtifact", url="codeartifact://calltree/python")
+    pool.add_repository(placeholder, priority=getattr(Priority, priority.upper()))
+
+    _activate(
+        [{"name": "codeartifact", "url": "codeartifact://calltree/python", "priority": priority}],
+        pool,
+    )
+
+    assert pool.removed == ["codeartifact"]
+    (repo,) = pool.all_repositories
+    assert repo.url == f"https://calltree{HOST}/pypi/python/simple"
+    assert pool.priority("codeartifact") == getattr(Priority, priority.upper())
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("codeartifact://calltree/python", "python/simple"),
+        ("codeartifact://calltree/python/", "python/simple"),
+        ("codeartifact://calltree/python/simple", "python/simple"),
+        ("codeartifact://calltree/python/custom/path", "python/custom/path"),
+    ],
+)
+def test_resolves_codeartifact_urls(url, expected):
+    pool = _activate([{"name": "codeartifact", "url": url}])
+
+    (repo,) = pool.all_repositories
+    assert repo.url == f"https://calltree{HOST}/pypi/{expected}"
+    assert pool.priority("codeartifact") == Priority.PRIMARY
+
+
+@pytest.mark.parametrize(
+    "url",
+    ["codeartifact://", "codeartifact://calltree", "codeartifact://calltree/", "codeartifact:///python"],
+)
+def test_skips_malformed_urls_with_a_warning(url, caplog):
+    pool = _activate([{"name": "codeartifact", "url": url}])
+
+    assert pool.all_repositories == []
+    assert f"Skipping source codeartifact: {url}" in caplog.text
+
+
+def test_leaves_other_sources_alone():
+    pool = _activate([{"name": "pypi-mirror", "url": "https://pypi.example.com/simple"}])
+
+    assert pool.all_repositories == []
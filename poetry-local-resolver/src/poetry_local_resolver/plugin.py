@@ -1,20 +1,218 @@
 """Poetry plugin that adds --local flag to use workspace packages."""
 
 import os
+import re
+import json
+import hashlib
 import sys
-import shutil
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Final, FrozenSet, List, Optional, Set, Tuple
 
-from cleo.io.io import IO
-from poetry.console.application import Application
 from poetry.console.commands.install import InstallCommand
 from poetry.plugins.application_plugin import ApplicationPlugin
 from cleo.helpers import option
 
+if TYPE_CHECKING:
+    from cleo.io.io import IO
+    from poetry.console.application import Application
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+
 logger = logging.getLogger(__name__)
 
+# `name = "..."` inside a table, tried [tool.poetry] first like the tomllib
+# path below. The lazy body (group 1) stops at the next "[", i.e. the next table
+# header (or an array, which falls back to tomllib)
+_SECTION_NAME_RES = tuple(
+    (
+        re.compile(rb"^[ \t]*\[" + header + rb"\]", re.MULTILINE),
+        re.compile(
+            rb"^[ \t]*\[" + header + rb'\]([^\[]*?)^[ \t]*name[ \t]*=[ \t]*"([^"\n]+)"',
+            re.MULTILINE,
+        ),
+    )
+    for header in (rb"tool\.poetry", rb"project")
+)
+
+_NORMALIZE_RE = re.compile(r"[-_.]+")
+
+# Persisted workspace scan results, keyed by pyproject.toml path
+_SCAN_CACHE_DIR_NAME = "calltree-local-resolver"
+_SCAN_CACHE_VERSION = 2
+
+# Directory names skipped during workspace discovery (exact matches, so
+# e.g. "MyLibrary" or "build-tools" are still scanned). Hidden directories
+# (.git, .venv, .tox, .idea, ...) are skipped wholesale
+_EXCLUDE_NAMES: Final[FrozenSet[str]] = frozenset({
+    "__pycache__", "venv", "node_modules", "dist", "build", "Library",
+})
+
+
+def _normalize(name: str) -> str:
+    """Normalize a distribution name per PEP 503 (``Foo_Bar`` -> ``foo-bar``)."""
+    return _NORMALIZE_RE.sub("-", name.lower())
+
+
+def _fast_pkg_name(raw: bytes) -> Optional[str]:
+    """Find the package name without parsing; None means parse the file instead."""
+    for header_re, name_re in _SECTION_NAME_RES:
+        match = name_re.search(raw)
+        if match:
+            body = match.group(1)
+            if b'"""' in body or b"'''" in body:
+                # The "name" line may sit inside a multi-line string
+                return None
+            return match.group(2).decode("utf-8")
+        if header_re.search(raw):
+            # The table exists but its name isn't in the simple form
+            return None
+    return None
+
+
+@lru_cache(maxsize=512)
+def _pkg_name_cached(path_str: str, mtime: float) -> Optional[str]:
+    """Extract package name from pyproject.toml, cached per ``(path, mtime)``."""
+    try:
+        with open(path_str, "rb") as f:
+            raw = f.read()
+        
+        # Fast path: pull the name straight out of the raw bytes
+        name = _fast_pkg_name(raw)
+        if name is not None:
+            return name
+        
+        data = tomllib.loads(raw.decode("utf-8"))
+    except (OSError, ValueError):
+        # ValueError covers TOMLDecodeError and UnicodeDecodeError
+        return None
+    
+    # Try Poetry section first
+    tool_section = data.get("tool")
+    poetry_section = tool_section.get("poetry") if isinstance(tool_section, dict) else None
+    if isinstance(poetry_section, dict) and isinstance(poetry_section.get("name"), str):
+        return poetry_section["name"]
+    
+    # Try PEP 621 project section
+    project_section = data.get("project")
+    if isinstance(project_section, dict) and isinstance(project_section.get("name"), str):
+        return project_section["name"]
+    return None
+
+
+def _read_pyproject_entry(
+    pyproject_path: str, cached: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Describe a pyproject.toml as ``{"mtime_ns", "size", "name"}``.
+
+    A ``cached`` entry is returned as-is while the file's mtime and size still
+    match, so unchanged files are only stat'ed. Returns None if the file is
+    missing.
+    """
+    try:
+        st = os.stat(pyproject_path)
+    except OSError:
+        # Covers FileNotFoundError, so callers need no exists() probe
+        return None
+    if (
+        cached
+        and cached.get("mtime_ns") == st.st_mtime_ns
+        and cached.get("size") == st.st_size
+    ):
+        return cached
+    return {
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "name": _pkg_name_cached(pyproject_path, st.st_mtime),
+    }
+
+
+def _scan_cache_path(workspace_dir: Path) -> Path:
+    """Return the scan cache file for a workspace, under the user cache dir."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache")
+    digest = hashlib.sha256(str(workspace_dir).encode("utf-8")).hexdigest()[:16]
+    return Path(cache_home) / _SCAN_CACHE_DIR_NAME / f"workspace-{digest}.json"
+
+
+def _load_scan_cache(cache_path: Path, workspace_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """Load persisted workspace scan entries, or an empty mapping."""
+    try:
+        data = json.loads(cache_path.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != _SCAN_CACHE_VERSION
+        or data.get("workspace") != str(workspace_dir)
+    ):
+        return {}
+    entries = data.get("entries")
+    if not isinstance(entries, dict):
+        return {}
+    # A malformed entry is treated as missing, so its file is simply re-read
+    return {
+        path: entry
+        for path, entry in entries.items()
+        if _is_valid_scan_entry(entry)
+    }
+
+
+def _is_valid_scan_entry(entry: Any) -> bool:
+    """Check that a cached entry has the shape _read_pyproject_entry produces."""
+    return (
+        isinstance(entry, dict)
+        and isinstance(entry.get("mtime_ns"), int)
+        and isinstance(entry.get("size"), int)
+        and "name" in entry
+        and (entry["name"] is None or isinstance(entry["name"], str))
+    )
+
+
+def _save_scan_cache(
+    cache_path: Path, workspace_dir: Path, entries: Dict[str, Dict[str, Any]]
+) -> None:
+    """Atomically persist workspace scan entries."""
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(
+            json.dumps({
+                "version": _SCAN_CACHE_VERSION,
+                "workspace": str(workspace_dir),
+                "entries": entries,
+            }),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.debug(f"Could not write workspace scan cache {cache_path}: {e}")
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+
+def _log_rmtree_error(func: Any, path: str, exc_info: Any) -> None:
+    """Report a leftover from a background rmtree instead of dropping it silently."""
+    logger.warning(f"Could not remove {path}: {exc_info[1]} (delete it manually)")
+
+
+def _scan_dist_infos(site_packages: Path) -> Dict[str, List[str]]:
+    """Map lowercased distribution names to their ``*.dist-info`` directories."""
+    dist_infos: Dict[str, List[str]] = {}
+    with os.scandir(site_packages) as entries:
+        for entry in entries:
+            if entry.name.endswith(".dist-info"):
+                key = entry.name.split("-", 1)[0].lower()
+                dist_infos.setdefault(key, []).append(entry.path)
+    return dist_infos
+
 
 class LocalInstallCommand(InstallCommand):
     """Extended install command with --local flag."""
@@ -24,6 +222,9 @@ class LocalInstallCommand(InstallCommand):
         option("local", "L", "Use local workspace packages when available"),
     ]
     
+    # Resolved lazily by _get_site_packages()
+    _site_packages: Optional[Path] = None
+    
     def handle(self) -> int:
         """Handle the install command with local workspace discovery."""
         use_local = self.option("local")
@@ -38,9 +239,35 @@ class LocalInstallCommand(InstallCommand):
                 self.line("")
                 self.line("<comment>Linking local workspace packages:</comment>")
                 
+                # One pip run for everything; packages only go through the
+                # per-package path when the batched install fails
+                linked = self._install_editable(workspace_packages)
+                
+                # pip must not run concurrently against one environment, so
+                # per-package installs stay serial
+                to_symlink = []
                 for name, path in workspace_packages.items():
-                    rel_path = os.path.relpath(path, Path.cwd())
-                    if self._link_local_package(name, path):
+                    if name in linked:
+                        continue
+                    source_path = self._find_source_path(name, path)
+                    if source_path is None:
+                        continue
+                    if self._install_one_editable(name, path):
+                        linked.add(name)
+                    else:
+                        to_symlink.append((name, path, source_path))
+                
+                # The symlink fallback is plain file I/O on per-package paths,
+                # so link packages in parallel; output stays on this thread
+                if to_symlink:
+                    with ThreadPoolExecutor(max_workers=min(8, len(to_symlink))) as executor:
+                        results = executor.map(lambda item: self._link_local_package(*item), to_symlink)
+                        linked.update(name for (name, _, _), ok in zip(to_symlink, results) if ok)
+                
+                cwd = Path.cwd()
+                for name, path in workspace_packages.items():
+                    rel_path = os.path.relpath(path, cwd)
+                    if name in linked:
                         self.line(f"  <info>✓ {name} → {rel_path}</info>")
                     else:
                         self.line(f"  <error>✗ {name} (failed to link)</error>")
@@ -50,140 +277,237 @@ class LocalInstallCommand(InstallCommand):
         
         return result
     
+    @cached_property
+    def _project_deps(self) -> FrozenSet[str]:
+        """Normalized names of all project dependencies, computed once."""
+        # all_requires is rebuilt on each access
+        if not (self.poetry and self.poetry.package):
+            return frozenset()
+        return frozenset(_normalize(dep.name) for dep in self.poetry.package.all_requires)
+    
     def _discover_workspace_packages(self) -> Dict[str, Path]:
         """Discover packages in the workspace that match project dependencies."""
         workspace_packages = {}
         project_dir = Path.cwd()
         workspace_dir = project_dir.parent
         
-        # Get project dependencies
-        project_deps = set()
-        if self.poetry and self.poetry.package:
-            for dep in self.poetry.package.all_requires:
-                project_deps.add(dep.name)
-        
-        # Patterns to exclude
-        exclude_patterns = [
-            "__pycache__", ".git", ".venv", "venv", 
-            "node_modules", ".tox", "dist", "build", 
-            ".Trash", ".cache", "Library"
-        ]
+        project_deps = self._project_deps
+        if not project_deps:
+            # Nothing could match, so skip the scan entirely
+            return workspace_packages
         
+        # Identify the current project by device/inode rather than resolving
+        # every sibling's full path
+        project_stat = project_dir.stat()
+        project_key = (project_stat.st_dev, project_stat.st_ino)
+        
+        candidates = []
         try:
-            for item in workspace_dir.iterdir():
-                if not item.is_dir():
-                    continue
+            with os.scandir(workspace_dir) as entries:
+                for entry in entries:
+                    # Skip excluded names first; this needs no syscall at all
+                    if entry.name.startswith(".") or entry.name in _EXCLUDE_NAMES:
+                        continue
                     
-                # Skip excluded directories
-                if any(pattern in item.name for pattern in exclude_patterns):
-                    continue
-                
-                # Skip the current project directory
-                if item.resolve() == project_dir.resolve():
+                    # DirEntry caches the file type from the directory read
+                    if not entry.is_dir():
+                        continue
+                        
+                    # Skip the current project directory. os.stat rather than
+                    # entry.stat(), which leaves st_ino/st_dev zeroed on Windows
+                    try:
+                        item_stat = os.stat(entry.path)
+                    except OSError:
+                        # Removed (or made unreadable) since the directory read
+                        continue
+                    if (item_stat.st_dev, item_stat.st_ino) == project_key:
+                        continue
+                        
+                    candidates.append(entry.path)
+            
+            # Reading pyproject.toml files is I/O bound, so overlap the reads;
+            # files unchanged since the last scan are only stat'ed
+            cache_path = _scan_cache_path(workspace_dir)
+            cached_entries = _load_scan_cache(cache_path, workspace_dir)
+            pyprojects = [os.path.join(path, "pyproject.toml") for path in candidates]
+            scanned: List[Optional[Dict[str, Any]]] = []
+            if pyprojects:
+                max_workers = min(32, (os.cpu_count() or 1) * 4, len(pyprojects))
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    scanned = list(executor.map(
+                        _read_pyproject_entry,
+                        pyprojects,
+                        [cached_entries.get(pyproject) for pyproject in pyprojects],
+                    ))
+            
+            entries = {
+                pyproject: entry
+                for pyproject, entry in zip(pyprojects, scanned)
+                if entry is not None
+            }
+            if entries != cached_entries:
+                _save_scan_cache(cache_path, workspace_dir, entries)
+            
+            # Keyed by normalized name for matching, but the declared name is
+            # what module lookup, linking and output use
+            found: Dict[str, Tuple[str, Path]] = {}
+            for path, entry in zip(candidates, scanned):
+                package_name = entry and entry["name"]
+                if not package_name:
                     continue
-                    
-                # Check for pyproject.toml
-                pyproject = item / "pyproject.toml"
-                if pyproject.exists() and os.access(pyproject, os.R_OK):
-                    package_name = self._get_package_name(pyproject)
-                    # Only include if it's a dependency of this project
-                    if package_name and package_name in project_deps:
-                        workspace_packages[package_name] = item
+                # Only include if it's a dependency of this project
+                normalized = _normalize(package_name)
+                if normalized in project_deps:
+                    found[normalized] = (package_name, Path(path))
+            workspace_packages = dict(found.values())
                         
-        except Exception as e:
+        except OSError as e:
+            # Per-file read and parse errors are handled where they occur;
+            # this only covers listing the workspace itself
             logger.debug(f"Error discovering workspace packages: {e}")
             
         return workspace_packages
     
-    def _get_package_name(self, pyproject_path: Path) -> Optional[str]:
-        """Extract package name from pyproject.toml."""
+    def _get_site_packages(self) -> Optional[Path]:
+        """Locate the environment's site-packages, remembering the first hit."""
+        if self._site_packages is not None:
+            return self._site_packages
+        
+        # Get the virtualenv path
+        env = self.env
+        venv_path = env.path if env else None
+        if not venv_path:
+            return None
+        
+        # Find the installed package location
+        # Use the environment's Python version, not the current interpreter's
+        version_info = env.version_info if hasattr(env, 'version_info') else sys.version_info
+        python_version = f"python{version_info[0]}.{version_info[1]}"
+        site_packages = venv_path / "lib" / python_version / "site-packages"
+        if not site_packages.exists():
+            # Try alternative path for Windows or non-standard layouts
+            site_packages = venv_path / "site-packages"
+            if not site_packages.exists():
+                logger.error(f"Could not find site-packages in {venv_path}")
+                return None
+        
+        self._site_packages = site_packages
+        return site_packages
+    
+    def _install_editable(self, packages: Dict[str, Path]) -> Set[str]:
+        """Install all packages in editable mode with a single pip invocation.
+        
+        Returns the names that were installed, or an empty set if pip failed.
+        """
+        site_packages = self._get_site_packages()
+        if not site_packages:
+            return set()
+        
+        pip_cmd = [sys.executable, "-m", "pip", "install", "--no-deps"]
+        for local_path in packages.values():
+            pip_cmd += ["-e", str(local_path)]
+        
         try:
-            import toml
-            data = toml.load(pyproject_path)
-            
-            # Try Poetry section first
-            poetry_section = data.get("tool", {}).get("poetry", {})
-            if "name" in poetry_section:
-                return poetry_section["name"]
-            
-            # Try PEP 621 project section
-            project_section = data.get("project", {})
-            if "name" in project_section:
-                return project_section["name"]
-        except Exception:
-            pass
+            import subprocess
+            result = subprocess.run(pip_cmd, capture_output=True, text=True)
+        except OSError as e:
+            logger.debug(f"Could not use pip for editable install: {e}")
+            return set()
+        
+        if result.returncode != 0:
+            logger.warning(f"Batched editable install failed, retrying one by one: {result.stderr}")
+            return set()
+        
+        # One directory listing serves every package's marker lookup
+        try:
+            dist_infos = _scan_dist_infos(site_packages)
+            for package_name, local_path in packages.items():
+                logger.info(f"Installed {package_name} in editable mode from {local_path}")
+                self._mark_local_development(dist_infos, package_name.replace("-", "_"), local_path)
+        except OSError as e:
+            logger.debug(f"Could not mark editable installs as local: {e}")
+        return set(packages)
+    
+    def _mark_local_development(
+        self, dist_infos: Dict[str, List[str]], module_name: str, local_path: Path
+    ) -> None:
+        """Tag a package's dist-info as an editable install from the workspace."""
+        for info_dir in dist_infos.get(module_name.lower(), ()):
+            marker_file = os.path.join(info_dir, "LOCAL_DEVELOPMENT")
+            Path(marker_file).write_text(f"Editable install from: {local_path}\n")
+    
+    def _find_source_path(self, package_name: str, local_path: Path) -> Optional[Path]:
+        """Locate the importable source directory inside a local package."""
+        # Convert package name to module name (e.g., calltree-common-lib -> calltree_common_lib)
+        module_name = package_name.replace("-", "_")
+        
+        # Try common source locations
+        source_candidates = [
+            local_path / "src" / module_name,
+            local_path / module_name,
+            local_path / "lib" / module_name,
+        ]
+        
+        for candidate in source_candidates:
+            if candidate.exists() and candidate.is_dir():
+                return candidate
+        
+        logger.warning(f"Could not find source directory for {package_name} in {local_path}")
+        logger.warning(f"Tried: {[str(c) for c in source_candidates]}")
         return None
     
-    def _link_local_package(self, package_name: str, local_path: Path) -> bool:
+    def _install_one_editable(self, package_name: str, local_path: Path) -> bool:
+        """Install a single package in editable mode; False means fall back to a symlink."""
+        site_packages = self._get_site_packages()
+        if not site_packages:
+            return False
+        
+        # Use pip to install in editable mode instead of symlinking
+        # This creates proper metadata that Poetry can work with
+        try:
+            pip_cmd = [sys.executable, "-m", "pip", "install", "-e", str(local_path), "--no-deps"]
+            import subprocess
+            result = subprocess.run(pip_cmd, capture_output=True, text=True)
+            if result.returncode == 0:
+                logger.info(f"Installed {package_name} in editable mode from {local_path}")
+                
+                # Mark as locally developed
+                dist_infos = _scan_dist_infos(site_packages)
+                self._mark_local_development(dist_infos, package_name.replace("-", "_"), local_path)
+                
+                return True
+            else:
+                logger.warning(f"Failed to install {package_name} in editable mode: {result.stderr}")
+                # Fall back to symlink method
+                
+        except Exception as e:
+            logger.debug(f"Could not use pip for editable install: {e}")
+        return False
+    
+    def _link_local_package(self, package_name: str, local_path: Path, source_path: Path) -> bool:
         """Replace installed package with symlink to local version."""
         try:
-            # Get the virtualenv path
-            venv_path = self.env.path if self.env else None
-            if not venv_path:
+            site_packages = self._get_site_packages()
+            if not site_packages:
                 return False
             
-            # Find the installed package location
-            # Use the environment's Python version, not the current interpreter's
-            python_version = f"python{self.env.version_info[0]}.{self.env.version_info[1]}" if hasattr(self.env, 'version_info') else f"python{sys.version_info.major}.{sys.version_info.minor}"
-            site_packages = venv_path / "lib" / python_version / "site-packages"
-            if not site_packages.exists():
-                # Try alternative path for Windows or non-standard layouts
-                site_packages = venv_path / "site-packages"
-                if not site_packages.exists():
-                    logger.error(f"Could not find site-packages in {venv_path}")
-                    return False
-            
-            # Convert package name to module name (e.g., calltree-common-lib -> calltree_common_lib)
             module_name = package_name.replace("-", "_")
             installed_path = site_packages / module_name
             
-            # Find the source directory in the local package
-            # Try common source locations
-            source_candidates = [
-                local_path / "src" / module_name,
-                local_path / module_name,
-                local_path / "lib" / module_name,
-            ]
-            
-            source_path = None
-            for candidate in source_candidates:
-                if candidate.exists() and candidate.is_dir():
-                    source_path = candidate
-                    break
-            
-            if not source_path:
-                logger.warning(f"Could not find source directory for {package_name} in {local_path}")
-                logger.warning(f"Tried: {[str(c) for c in source_candidates]}")
-                return False
-            
-            # First, use pip to install in editable mode instead of symlinking
-            # This creates proper metadata that Poetry can work with
-            try:
-                pip_cmd = [sys.executable, "-m", "pip", "install", "-e", str(local_path), "--no-deps"]
-                import subprocess
-                result = subprocess.run(pip_cmd, capture_output=True, text=True)
-                if result.returncode == 0:
-                    logger.info(f"Installed {package_name} in editable mode from {local_path}")
-                    
-                    # Mark as locally developed
-                    for info_dir in site_packages.glob(f"{module_name}*.dist-info"):
-                        marker_file = info_dir / "LOCAL_DEVELOPMENT"
-                        marker_file.write_text(f"Editable install from: {local_path}\n")
-                    
-                    return True
-                else:
-                    logger.warning(f"Failed to install {package_name} in editable mode: {result.stderr}")
-                    # Fall back to symlink method
-                    
-            except Exception as e:
-                logger.debug(f"Could not use pip for editable install: {e}")
-            
             # Fallback: Remove existing installation and create symlink
             if installed_path.exists():
                 if installed_path.is_symlink():
                     installed_path.unlink()
                 elif installed_path.is_dir():
-                    shutil.rmtree(installed_path)
+                    # Renaming is O(1) however big the old tree is; delete it
+                    # off the critical path. Not a daemon thread, so the
+                    # cleanup still finishes before Poetry exits
+                    import shutil
+                    trash_path = installed_path.with_name(f"{installed_path.name}.trash-{os.getpid()}")
+                    os.rename(installed_path, trash_path)
+                    threading.Thread(
+                        target=shutil.rmtree, args=(trash_path,), kwargs={"onerror": _log_rmtree_error}
+                    ).start()
                 else:
                     installed_path.unlink()
             
@@ -220,24 +544,40 @@ Home-page: {local_path}
             return False
 
 
+def _install_command_factory() -> LocalInstallCommand:
+    """Build the extended install command.
+
+    cleo caches the command after the first lookup, so this runs once per
+    application; each instance keeps its own project and environment state.
+    """
+    return LocalInstallCommand()
+
+
 class LocalResolverPlugin(ApplicationPlugin):
     """Plugin that adds --local flag for workspace package discovery."""
     
-    def activate(self, application: Application, io: Optional[IO] = None) -> None:
+    def activate(self, application: "Application", io: Optional["IO"] = None) -> None:
         """Activate the plugin and replace the install command."""
         
         try:
-            # Configure logging
-            logging.basicConfig(
-                level=logging.INFO,
-                format='[%(name)s] %(message)s'
-            )
+            # Configure logging for this plugin only, leaving the root logger
+            # (and every other library's output) alone
+            if not logger.handlers:
+                handler = logging.StreamHandler()
+                handler.setFormatter(logging.Formatter('[%(name)s] %(message)s'))
+                logger.addHandler(handler)
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
             
             # Replace the install command with our extended version
             factory = application.command_loader
             if factory and hasattr(factory, "_factories"):
+                # Already hooked by an earlier activation of this application
+                if factory._factories.get("install") is _install_command_factory:
+                    return
+                
                 # Override the install command factory
-                factory._factories["install"] = lambda: LocalInstallCommand()
+                factory._factories["install"] = _install_command_factory
                 logger.info("Local resolver plugin activated - use 'poetry install --local'")
                 
         except Exception as e:
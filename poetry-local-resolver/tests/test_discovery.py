@@ -0,0 +1,59 @@
+"""Tests for workspace package discovery."""
+
+import pytest
+
+pytest.importorskip("poetry")
+
+from poetry_local_resolver import plugin  # noqa: E402
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    workspace_dir = tmp_path / "workspace"
+    for folder, name in [
+        ("project", "project"),
+        ("calltree_utils", "calltree-utils"),
+        ("Other", "other-pkg"),
+        ("unrelated", "unrelated"),
+    ]:
+        (workspace_dir / folder).mkdir(parents=True)
+        (workspace_dir / folder / "pyproject.toml").write_text(f'[tool.poetry]\nname = "{name}"\n')
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.chdir(workspace_dir / "project")
+    return workspace_dir
+
+
+def _discover(deps):
+    command = plugin.LocalInstallCommand()
+    # Bypass the cached_property, which needs a loaded Poetry project
+    command.__dict__["_project_deps"] = frozenset(deps)
+    return command._discover_workspace_packages()
+
+
+def test_finds_packages_whose_folder_is_named_differently(workspace):
+    found = _discover({"calltree-utils", "other-pkg"})
+
+    assert found == {
+        "calltree-utils": workspace / "calltree_utils",
+        "other-pkg": workspace / "Other",
+    }
+
+
+def test_skips_the_current_project(workspace):
+    assert _discover({"project"}) == {}
+
+
+def test_ignores_packages_that_are_not_dependencies(workspace):
+    assert _discover({"calltree-utils"}) == {"calltree-utils": workspace / "calltree_utils"}
+
+
+def test_keeps_the_declared_package_name(workspace):
+    (workspace / "MyLib" / "src" / "MyLib").mkdir(parents=True)
+    (workspace / "MyLib" / "pyproject.toml").write_text('[tool.poetry]\nname = "MyLib"\n')
+
+    found = _discover({"mylib"})
+
+    assert found == {"MyLib": workspace / "MyLib"}
+    source_path = plugin.LocalInstallCommand()._find_source_path("MyLib", found["MyLib"])
+    assert source_path == workspace / "MyLib" / "src" / "MyLib"
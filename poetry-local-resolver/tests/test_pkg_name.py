@@ -0,0 +1,36 @@
+"""Tests for reading the package name out of pyproject.toml."""
+
+import pytest
+
+pytest.importorskip("poetry")
+
+from poetry_local_resolver import plugin  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "contents, expected",
+    [
+        ('[tool.poetry]\nname = "calltree-utils"\nversion = "1.0"\n', "calltree-utils"),
+        ('[project]\nname = "calltree-utils"\n', "calltree-utils"),
+        # [tool.poetry] wins regardless of table order
+        ('[project]\nname = "a"\n\n[tool.poetry]\nname = "b"\n', "b"),
+        ('[tool.poetry]\nname = "b"\n\n[project]\nname = "a"\n', "b"),
+        # A "name" line inside a multi-line string is not the package name
+        (
+            '[tool.poetry]\ndescription = """\nname = "fake"\n"""\nname = "real"\n',
+            "real",
+        ),
+        ("[tool.poetry]\ndescription = '''\nname = \"fake\"\n'''\nname = \"real\"\n", "real"),
+        # Name after an array or in a form the fast path doesn't handle
+        ('[tool.poetry]\npackages = [{ include = "x" }]\nname = "b"\n\n[project]\nname = "a"\n', "b"),
+        ("[tool.poetry]\nname = 'single-quoted'\n", "single-quoted"),
+        ('[tool.poetry]\nversion = "1.0"\n\n[project]\nname = "a"\n', "a"),
+        ('[tool.black]\nline-length = 100\n', None),
+        ("not = [valid toml", None),
+    ],
+)
+def test_matches_the_parsed_name(tmp_path, contents, expected):
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text(contents)
+
+    assert plugin._pkg_name_cached(str(pyproject), pyproject.stat().st_mtime) == expected
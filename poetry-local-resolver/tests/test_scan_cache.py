@@ -0,0 +1,118 @@
+"""Tests for the persisted workspace scan cache."""
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip("poetry")
+
+from poetry_local_resolver import plugin  # noqa: E402
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    workspace_dir = tmp_path / "workspace"
+    package_dir = workspace_dir / "calltree_utils"
+    package_dir.mkdir(parents=True)
+    (package_dir / "pyproject.toml").write_text('[tool.poetry]\nname = "calltree-utils"\n')
+    return workspace_dir
+
+
+def _entry_for(pyproject):
+    return plugin._read_pyproject_entry(str(pyproject))
+
+
+def test_round_trip(tmp_path, workspace):
+    cache_path = tmp_path / "cache" / "workspace.json"
+    pyproject = workspace / "calltree_utils" / "pyproject.toml"
+    entries = {str(pyproject): _entry_for(pyproject)}
+
+    plugin._save_scan_cache(cache_path, workspace, entries)
+
+    assert plugin._load_scan_cache(cache_path, workspace) == entries
+    assert entries[str(pyproject)]["name"] == "calltree-utils"
+
+
+def test_unchanged_file_returns_cached_entry(workspace):
+    pyproject = workspace / "calltree_utils" / "pyproject.toml"
+    cached = _entry_for(pyproject)
+
+    assert plugin._read_pyproject_entry(str(pyproject), cached) is cached
+
+
+def test_changed_file_is_reread(workspace):
+    pyproject = workspace / "calltree_utils" / "pyproject.toml"
+    cached = dict(_entry_for(pyproject), size=-1, name="stale")
+
+    entry = plugin._read_pyproject_entry(str(pyproject), cached)
+
+    assert entry is not cached
+    assert entry["name"] == "calltree-utils"
+
+
+def test_other_workspace_or_version_is_ignored(tmp_path, workspace):
+    cache_path = tmp_path / "workspace.json"
+    pyproject = workspace / "calltree_utils" / "pyproject.toml"
+    plugin._save_scan_cache(cache_path, workspace, {str(pyproject): _entry_for(pyproject)})
+
+    assert plugin._load_scan_cache(cache_path, tmp_path / "elsewhere") == {}
+
+    data = json.loads(cache_path.read_text())
+    data["version"] = plugin._SCAN_CACHE_VERSION + 1
+    cache_path.write_text(json.dumps(data))
+    assert plugin._load_scan_cache(cache_path, workspace) == {}
+
+
+@pytest.mark.parametrize("contents", ["", "not json", "[]", '{"version": 2}'])
+def test_unreadable_cache_is_empty(tmp_path, workspace, contents):
+    cache_path = tmp_path / "workspace.json"
+    cache_path.write_text(contents)
+
+    assert plugin._load_scan_cache(cache_path, workspace) == {}
+
+
+def test_missing_cache_is_empty(tmp_path, workspace):
+    assert plugin._load_scan_cache(tmp_path / "missing.json", workspace) == {}
+
+
+@pytest.mark.parametrize(
+    "broken",
+    [
+        None,
+        "calltree-utils",
+        ["mtime_ns", "size", "name"],
+        {"mtime_ns": 1, "size": 1},
+        {"mtime_ns": 1, "size": 1, "name": 42},
+        {"mtime_ns": "1", "size": 1, "name": "calltree-utils"},
+        {"mtime_ns": 1, "size": None, "name": "calltree-utils"},
+    ],
+)
+def test_malformed_entries_are_dropped(tmp_path, workspace, broken):
+    cache_path = tmp_path / "workspace.json"
+    pyproject = workspace / "calltree_utils" / "pyproject.toml"
+    good = _entry_for(pyproject)
+    cache_path.write_text(json.dumps({
+        "version": plugin._SCAN_CACHE_VERSION,
+        "workspace": str(workspace),
+        "entries": {str(pyproject): good, os.path.join(str(workspace), "x", "pyproject.toml"): broken},
+    }))
+
+    assert plugin._load_scan_cache(cache_path, workspace) == {str(pyproject): good}
+
+
+def test_entry_without_name_falls_back_to_reading_the_file(tmp_path, workspace):
+    cache_path = tmp_path / "workspace.json"
+    pyproject = workspace / "calltree_utils" / "pyproject.toml"
+    entry = _entry_for(pyproject)
+    del entry["name"]
+    cache_path.write_text(json.dumps({
+        "version": plugin._SCAN_CACHE_VERSION,
+        "workspace": str(workspace),
+        "entries": {str(pyproject): entry},
+    }))
+
+    cached = plugin._load_scan_cache(cache_path, workspace)
+    fresh = plugin._read_pyproject_entry(str(pyproject), cached.get(str(pyproject)))
+
+    assert fresh["name"] == "calltree-utils"